@@ -1,17 +1,30 @@
 import os
+import re
 import uuid
 import json
-import threading
+import base64
+import copy
 import time
+import shutil
+import hashlib
 import logging
+import threading
+import multiprocessing
+import redis
 import requests
+from requests.adapters import HTTPAdapter
+import numpy as np
+import tiktoken
 from datetime import timedelta
 from flask import Flask, request, jsonify, session, render_template
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
-from functools import wraps
-import pdfplumber
-from docx import Document
+from abc import ABC, abstractmethod
+from functools import wraps, lru_cache
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, CancelledError, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from extraction import extract_text_from_pdf, extract_text_from_docx, parse_with_deadline, ParseTimeout
 
 # ==================================================
 # App Configuration
@@ -22,21 +35,72 @@ app.permanent_session_lifetime = timedelta(days=7)
 
 UPLOAD_FOLDER = "uploads"
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+ALLOWED_EXTENSIONS = {"pdf", "docx"}
+UPLOAD_CHUNK_SIZE = 1 << 16  # 64 KB
 
 # ==================================================
 # Logging
 # ==================================================
 logging.basicConfig(
     level=logging.INFO,
-    format="%(asctime)s | %(levelname)s | %(message)s"
+    format="%(asctime)s | %(levelname)s | %(threadName)s | %(message)s"
 )
 logger = logging.getLogger(__name__)
 
 # ==================================================
-# Ollama Configuration
+# LLM Configuration
 # ==================================================
+LLM_BACKEND = os.getenv("LLM_BACKEND", "ollama")  # "ollama" or "vllm"
+OLLAMA_BATCH_SIZE = int(os.getenv("OLLAMA_BATCH_SIZE", 2))  # CVs scored per request
+
+# Token budget. tinyllama was trained on a 2048-token context; the system
+# prompt, every CV in a batch and the output all have to fit inside it.
+MODEL_CONTEXT_TOKENS = int(os.getenv("MODEL_CONTEXT_TOKENS", 2048))
+MAX_OUTPUT_TOKENS = 200  # per CV result
+PROMPT_OVERHEAD_TOKENS = 250  # instructions, output format, chat template
+JOB_TOKEN_BUDGET = 400
+CV_TOKEN_BUDGET = (
+    MODEL_CONTEXT_TOKENS - PROMPT_OVERHEAD_TOKENS - JOB_TOKEN_BUDGET
+    - MAX_OUTPUT_TOKENS * OLLAMA_BATCH_SIZE
+) // OLLAMA_BATCH_SIZE
+if CV_TOKEN_BUDGET < 100:
+    raise ValueError(
+        f"OLLAMA_BATCH_SIZE={OLLAMA_BATCH_SIZE} leaves {CV_TOKEN_BUDGET} tokens per CV "
+        f"in a {MODEL_CONTEXT_TOKENS}-token context"
+    )
+
+# Truncation counts cl100k tokens; llama's tokenizer needs ~30% more for the same text
+MODEL_TOKENS_PER_CL100K_TOKEN = 1.3
+MAX_JOB_TOKENS = int(JOB_TOKEN_BUDGET / MODEL_TOKENS_PER_CL100K_TOKEN)
+MAX_CV_TOKENS = int(CV_TOKEN_BUDGET / MODEL_TOKENS_PER_CL100K_TOKEN)
+
 OLLAMA_URL = "http://localhost:11434/api/generate"
-OLLAMA_MODEL = "tinyllama"
+# The default tag is already 4-bit (Q4_0). OLLAMA_MODEL=tinyllama:1.1b-chat-v1-q4_K_M
+# opts into the K-quant build (slightly larger, usually closer to full precision)
+# after `ollama pull`ing it.
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "tinyllama")
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")  # keep model + prompt cache loaded
+OLLAMA_NUM_CTX = MODEL_CONTEXT_TOKENS
+
+# vLLM OpenAI-compatible server (continuous batching across requests)
+VLLM_URL = os.getenv("VLLM_URL", "http://vllm:8000/v1/completions")
+VLLM_MODEL = os.getenv("VLLM_MODEL", "tinyllama")
+
+# Match Ollama's own parallelism; extra workers would only queue inside Ollama
+OLLAMA_CONCURRENCY = int(os.getenv("OLLAMA_CONCURRENCY", os.getenv("OLLAMA_NUM_PARALLEL", 4)))
+# Every gunicorn worker process runs its own screening pool, so the budget is
+# split between them and Ollama still sees at most OLLAMA_CONCURRENCY requests
+# (as long as there are no more workers than that)
+WEB_WORKERS = int(os.getenv("WEB_CONCURRENCY", 1))
+SCREENING_WORKERS = max(OLLAMA_CONCURRENCY // WEB_WORKERS, 1)
+
+# Shared HTTP session so connections to the LLM server are pooled across calls.
+# One kept-alive connection per screening thread; requests' default pool
+# (10) would discard sockets once SCREENING_WORKERS exceeds it.
+SESSION = requests.Session()
+_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=SCREENING_WORKERS)
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
 
 # ==================================================
 # Mock Users
@@ -45,8 +109,7 @@ mock_users = {
     "test@ke.com": {
         "id": 1,
         "password_hash": generate_password_hash("123456"),
-        "plan": "trial",
-        "usage_count": 0
+        "plan": "trial"
     }
 }
 
@@ -61,9 +124,63 @@ PLANS = {
 }
 
 # ==================================================
-# Progress tracking (in-memory)
+# Progress tracking (Redis)
 # ==================================================
-progress_store = {}  # job_id: {"progress": 0-100, "message": "", "result": {...}}
+# Shared by every worker process and survives restarts;
+# job:<job_id> -> {"progress": 0-100, "message": "", "result": "<json>"}
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+PROGRESS_TTL = 3600  # seconds
+redis_client = redis.Redis.from_url(REDIS_URL, decode_responses=True)
+
+def set_progress(job_id, progress, message, result=None):
+    key = f"job:{job_id}"
+    pipe = redis_client.pipeline()
+    pipe.hset(key, mapping={"progress": progress, "message": message, "result": json.dumps(result)})
+    pipe.expire(key, PROGRESS_TTL)
+    pipe.execute()
+
+MAX_PROGRESS_IDS = 1000  # per /jobs/progress request
+
+def get_progress(job_ids):
+    pipe = redis_client.pipeline()
+    for job_id in job_ids:
+        pipe.hgetall(f"job:{job_id}")
+    jobs = {}
+    for job_id, job in zip(job_ids, pipe.execute()):
+        jobs[job_id] = {
+            "progress": int(job["progress"]),
+            "message": job["message"],
+            "result": json.loads(job["result"]),
+        } if job else None
+    return jobs
+
+# Screening runs per user, shared across worker processes: usage:<user_id> -> count
+def reserve_usage(user):
+    """Count one screening run against the user's plan; False if over the limit."""
+    key = f"usage:{user['id']}"
+    if redis_client.incr(key) > PLANS[user["plan"]]["limit"]:
+        redis_client.decr(key)
+        return False
+    return True
+
+# Bounded pool for screening jobs; caps concurrent requests hitting Ollama
+EXECUTOR = ThreadPoolExecutor(max_workers=SCREENING_WORKERS, thread_name_prefix="screening")
+
+# PDF/DOCX parsing is CPU-bound, so it runs in worker processes instead of
+# serializing screening threads on the GIL. "spawn" avoids forking a process
+# that already has threads running.
+# Each gunicorn worker has its own pool, so they share the host's CPUs
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", max((os.cpu_count() or 1) // WEB_WORKERS, 1)))
+EXTRACT_TIMEOUT = 60  # seconds of parsing per file, enforced inside the worker
+
+def create_extract_pool():
+    return ProcessPoolExecutor(max_workers=EXTRACT_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+
+extract_pool = create_extract_pool()
+extract_pool_lock = threading.Lock()
+# At most one file per worker in flight, so a file never waits in the pool's
+# queue and the result() timeout below only measures the parse itself
+extract_slots = threading.BoundedSemaphore(EXTRACT_WORKERS)
 
 # ==================================================
 # Authentication Middleware
@@ -77,42 +194,170 @@ def login_required(fn):
     wrapper.__name__ = fn.__name__
     return wrapper
 
+# ==================================================
+# Exact-Match Caches
+# ==================================================
+class LRUCache:
+    """Thread-safe in-process LRU mapping, optionally backed by Redis.
+
+    With a redis_prefix, entries are also stored as JSON in Redis so they
+    are shared by every worker process and survive restarts.
+    """
+
+    def __init__(self, maxsize, redis_prefix=None, ttl=None):
+        self.maxsize = maxsize
+        self.redis_prefix = redis_prefix
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.data = OrderedDict()
+
+    def _remember(self, key, value):
+        with self.lock:
+            self.data[key] = copy.deepcopy(value)
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def get(self, key):
+        with self.lock:
+            if key in self.data:
+                self.data.move_to_end(key)
+                return copy.deepcopy(self.data[key])
+        if not self.redis_prefix:
+            return None
+        try:
+            raw = redis_client.get(self.redis_prefix + key)
+        except redis.RedisError as e:
+            logger.error(f"Cache read failed: {e}")
+            return None
+        if raw is None:
+            return None
+        value = json.loads(raw)
+        self._remember(key, value)
+        return value
+
+    def set(self, key, value):
+        self._remember(key, value)
+        if self.redis_prefix:
+            try:
+                redis_client.set(self.redis_prefix + key, json.dumps(value), ex=self.ttl)
+            except redis.RedisError as e:
+                logger.error(f"Cache write failed: {e}")
+
+# Uploads get unique names, so extraction is keyed on file content
+extract_cache = LRUCache(maxsize=512)
+llm_cache = LRUCache(maxsize=10000, redis_prefix="llm:", ttl=7 * 24 * 3600)
+
+# ==================================================
+# Uploads
+# ==================================================
+def allowed_file(filename):
+    return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
+
+def upload_path(filename):
+    """Unique path under UPLOAD_FOLDER that keeps the validated extension.
+
+    secure_filename drops non-ASCII characters, so "резюме.pdf" would
+    otherwise be saved as "pdf" with no extension.
+    """
+    stem, ext = filename.rsplit(".", 1)
+    return os.path.join(UPLOAD_FOLDER, f"{uuid.uuid4()}_{secure_filename(stem) or 'upload'}.{ext.lower()}")
+
+def save_upload(file, path):
+    # Copy in fixed-size chunks rather than holding the whole upload in memory
+    with open(path, "wb") as f:
+        shutil.copyfileobj(file.stream, f, UPLOAD_CHUNK_SIZE)
+
 # ==================================================
 # File Text Extraction
 # ==================================================
-def extract_text_from_pdf(path):
-    try:
-        text = ""
-        with pdfplumber.open(path) as pdf:
-            for page in pdf.pages:
-                text += page.extract_text() or ""
-        return text.strip()
-    except Exception as e:
-        logger.error(f"PDF extraction failed: {e}")
+def extract_text(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in (".pdf", ".docx"):
         return ""
-
-def extract_text_from_docx(path):
     try:
-        doc = Document(path)
-        return "\n".join(p.text for p in doc.paragraphs).strip()
-    except Exception as e:
-        logger.error(f"DOCX extraction failed: {e}")
+        # Read the whole file once; parsing from memory beats a file handle
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError as e:
+        logger.error(f"Reading {path} failed: {e}")
         return ""
 
-def extract_text(path):
-    if path.endswith(".pdf"):
-        return extract_text_from_pdf(path)
-    if path.endswith(".docx"):
-        return extract_text_from_docx(path)
-    return ""
+    key = f"{hashlib.sha256(data).hexdigest()}{ext}"
+    text = extract_cache.get(key)
+    if text is None:
+        parse = extract_text_from_pdf if ext == ".pdf" else extract_text_from_docx
+        text = parse_in_pool(parse, data, path)
+        # None is a pool failure, not the file's content; let a re-upload retry
+        if text is not None:
+            extract_cache.set(key, text)
+    return text
+
+def reset_extract_pool(old_pool):
+    """Replace old_pool with a fresh pool unless another thread already did."""
+    global extract_pool
+    with extract_pool_lock:
+        if extract_pool is old_pool:
+            extract_pool = create_extract_pool()
+    # Work already handed to old_pool finishes there; nothing is cancelled
+    old_pool.shutdown(wait=False)
+
+def parse_in_pool(parse, data, path):
+    """Run parse(data) in the extraction pool; None if the pool can't.
+
+    Inputs are never parsed in the web process, so a file that kills or
+    hangs a worker can't take a screening thread down with it.
+    """
+    for _ in range(2):
+        with extract_slots:
+            pool = extract_pool
+            try:
+                future = pool.submit(parse_with_deadline, parse, data, EXTRACT_TIMEOUT)
+                # The worker's own alarm fires first; this only catches a parse
+                # stuck in native code, which the alarm can't interrupt
+                return future.result(timeout=EXTRACT_TIMEOUT * 2)
+            except ParseTimeout:
+                logger.error(f"Extraction of {path} timed out after {EXTRACT_TIMEOUT}s")
+                return None
+            except (BrokenProcessPool, CancelledError, RuntimeError):
+                # A worker died (possibly on another file) or the pool was just
+                # replaced; retry once on a fresh pool
+                reset_extract_pool(pool)
+            except FutureTimeoutError:
+                # Abandon the stuck worker with its pool; later files use a new one
+                logger.error(f"Extraction of {path} is stuck; replacing the extraction pool")
+                reset_extract_pool(pool)
+                return None
+    logger.error(f"Extraction of {path} failed: worker crashed")
+    return None
 
 # ==================================================
 # Robust Prompt Builder
 # ==================================================
-def build_evaluation_prompt(job_text, cv_text):
-    return f"""
-You are a senior HR professional with over 20 years of experience.
+@lru_cache(maxsize=None)
+def get_tokenizer():
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.error(f"Tokenizer load failed, truncating by characters: {e}")
+        return None
+
+def truncate_tokens(text, limit):
+    tokenizer = get_tokenizer()
+    if tokenizer is None:
+        return text[:limit * 4]  # ~4 characters per token for English text
+    ids = tokenizer.encode(text, disallowed_special=())
+    return text if len(ids) <= limit else tokenizer.decode(ids[:limit])
+
+# Fixed templates, filled with str.format_map so every prompt shares the
+# exact same byte layout around the inserted text
+SYSTEM_PROMPT_TEMPLATE = """You are a senior HR professional with over 20 years of experience.
 
+JOB DESCRIPTION:
+{job}
+"""
+
+EVALUATION_PROMPT_TEMPLATE = """
 TASK:
 Evaluate how well the candidate fits the job.
 
@@ -120,11 +365,8 @@ STRICT RULES:
 - Respond ONLY with valid JSON
 - No markdown
 
-JOB DESCRIPTION:
-{job_text[:1200]}
-
 CANDIDATE CV:
-{cv_text[:1200]}
+{cv}
 
 OUTPUT FORMAT:
 {{
@@ -136,57 +378,469 @@ OUTPUT FORMAT:
 }}
 """
 
+BATCH_CV_TEMPLATE = "CV_{index}:\n{cv}"
+
+BATCH_EVALUATION_PROMPT_TEMPLATE = """
+TASK:
+Evaluate how well each candidate fits the job.
+
+STRICT RULES:
+- Respond ONLY with a valid JSON array, one object per CV
+- No markdown
+
+CANDIDATE CVS:
+{cvs}
+
+OUTPUT FORMAT:
+[
+  {{
+    "id": <CV number>,
+    "applicant_name": "<Full Name>",
+    "contact": "<Email or Phone>",
+    "score": <integer 0-100>,
+    "explanation": "<short explanation>",
+    "matched_skills": ["skill1", "skill2"]
+  }}
+]
+"""
+
+def prompt_job_text(job_text):
+    """The part of the job description the model sees."""
+    return truncate_tokens(job_text.strip(), MAX_JOB_TOKENS)
+
+@lru_cache(maxsize=32)
+def build_system_prompt(job_text):
+    """Job description part of the prompt, shared by every CV for that job.
+
+    Cached so repeated calls return the byte-identical string, which lets
+    the LLM server reuse its KV cache for this prefix across requests.
+    """
+    # job_text is already truncated with prompt_job_text
+    return SYSTEM_PROMPT_TEMPLATE.format_map({"job": job_text})
+
+def prompt_cv_text(cv_text):
+    """The part of a CV the model sees; the semantic cache keys on the same text."""
+    return truncate_tokens(cv_text, MAX_CV_TOKENS)
+
+def build_evaluation_prompt(cv_text):
+    # cv_text is already truncated with prompt_cv_text
+    return EVALUATION_PROMPT_TEMPLATE.format_map({"cv": cv_text})
+
+def build_batch_evaluation_prompt(cv_texts):
+    cvs = "\n---\n".join(
+        BATCH_CV_TEMPLATE.format_map({"index": i, "cv": cv_text})
+        for i, cv_text in enumerate(cv_texts, start=1)
+    )
+    return BATCH_EVALUATION_PROMPT_TEMPLATE.format_map({"cvs": cvs})
+
 # ==================================================
-# Ollama JSON Request
+# LLM Backends
 # ==================================================
-def ollama_json_request(prompt, timeout=120):
-    payload = {"model": OLLAMA_MODEL, "prompt": prompt, "stream": False}
+JSON_DECODER = json.JSONDecoder()
+
+def parse_json_response(raw):
+    """Decode the first JSON object/array in raw, ignoring any trailing text."""
+    starts = [i for i in (raw.find("{"), raw.find("[")) if i != -1]
+    if not starts:
+        raise ValueError("No JSON in LLM response")
+    result, _ = JSON_DECODER.raw_decode(raw, min(starts))
+    return result
+
+class LLMBackend(ABC):
+    """Completion endpoint streaming raw model text for a prompt."""
+
+    def __init__(self, url, model):
+        self.url = url
+        self.model = model
+
+    @property
+    @abstractmethod
+    def name(self):
+        """Backend label, part of every llm_cache key."""
+
+    @abstractmethod
+    def stream(self, prompt, system=None, max_tokens=MAX_OUTPUT_TOKENS, timeout=120):
+        """Yield response text chunks as the model generates them."""
+
+    def generate_json(self, prompt, system=None, max_tokens=MAX_OUTPUT_TOKENS, timeout=120):
+        """Return the first JSON value in the response, hanging up once it is complete.
+
+        Closing the stream early stops the server generating tokens we would
+        discard anyway (trailing text, repeats, padding up to max_tokens).
+        """
+        buffer = ""
+        chunks = self.stream(prompt, system=system, max_tokens=max_tokens, timeout=timeout)
+        try:
+            for chunk in chunks:
+                buffer += chunk
+                if "}" in chunk or "]" in chunk:
+                    try:
+                        return parse_json_response(buffer)
+                    except ValueError:
+                        continue
+        finally:
+            chunks.close()
+        return parse_json_response(buffer)
+
+class OllamaBackend(LLMBackend):
+    name = "ollama"
+
+    def stream(self, prompt, system=None, max_tokens=MAX_OUTPUT_TOKENS, timeout=120):
+        payload = {
+            "model": self.model,
+            "system": system,
+            "prompt": prompt,
+            "stream": True,
+            "keep_alive": OLLAMA_KEEP_ALIVE,
+            # Bounded, greedy output: decoding length dominates latency
+            "options": {
+                "num_predict": max_tokens,
+                "temperature": 0,
+                "top_k": 1,
+                "num_ctx": OLLAMA_NUM_CTX,
+            },
+        }
+        with SESSION.post(self.url, json=payload, timeout=timeout, stream=True) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if "error" in chunk:
+                    raise RuntimeError(chunk["error"])
+                yield chunk.get("response", "")
+                if chunk.get("done"):
+                    break
+
+class VLLMBackend(LLMBackend):
+    name = "vllm"
+
+    def stream(self, prompt, system=None, max_tokens=MAX_OUTPUT_TOKENS, timeout=120):
+        # No separate system field; a shared leading prefix still hits vLLM's prefix cache
+        if system:
+            prompt = system + prompt
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "max_tokens": max_tokens,
+            "temperature": 0,
+            "stream": True,
+        }
+        with SESSION.post(self.url, json=payload, timeout=timeout, stream=True) as response:
+            response.raise_for_status()
+            # Server-sent events: "data: {...}" lines, terminated by "data: [DONE]"
+            for line in response.iter_lines():
+                if not line.startswith(b"data:"):
+                    continue
+                data = line[len(b"data:"):].strip()
+                if data == b"[DONE]":
+                    break
+                yield json.loads(data)["choices"][0]["text"]
+
+def create_llm_backend(name):
+    if name == "vllm":
+        return VLLMBackend(VLLM_URL, VLLM_MODEL)
+    if name == "ollama":
+        return OllamaBackend(OLLAMA_URL, OLLAMA_MODEL)
+    raise ValueError(f"Unknown LLM_BACKEND: {name}")
+
+llm = create_llm_backend(LLM_BACKEND)
+
+def llm_json_request(prompt, system=None, max_tokens=MAX_OUTPUT_TOKENS, timeout=120):
+    cache_key = hashlib.sha256(f"{llm.name}:{llm.model}\n{system}\n{prompt}".encode()).hexdigest()
+    cached = llm_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     try:
-        response = requests.post(OLLAMA_URL, json=payload, timeout=timeout)
-        response.raise_for_status()
-        raw = response.json().get("response", "").strip()
-        return json.loads(raw)
+        result = llm.generate_json(prompt, system=system, max_tokens=max_tokens, timeout=timeout)
+        llm_cache.set(cache_key, result)
+        return result
     except Exception as e:
-        logger.error(f"Ollama request failed: {e}")
+        logger.error(f"LLM request failed ({llm.name}): {e}")
         return None
 
 # ==================================================
-# Background Task
+# Semantic Result Cache
 # ==================================================
-def screen_cv_job(job_id, job_text, cv_path, filename):
-    try:
-        progress_store[job_id] = {"progress": 5, "message": "Reading CV", "result": None}
-        cv_text = extract_text(cv_path)
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+EMBED_WINDOW_WORDS = 150  # MiniLM reads at most 256 word pieces per input
+# Only the score is reused: the explanation and skills of a cached entry
+# describe another candidate, and name and contact always come from the CV
+REUSED_SCORE_EXPLANATION = "Score reused from a near-identical CV"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.95))
+SEMANTIC_CACHE_MAX_ENTRIES = 10000
+SEMANTIC_CACHE_KEY = "semantic:entries"  # Redis stream shared by all workers
+
+def _encode_vector(vector):
+    return base64.b64encode(np.asarray(vector, dtype=np.float32).tobytes()).decode()
+
+def _decode_vector(value):
+    return np.frombuffer(base64.b64decode(value), dtype=np.float32)
+
+class SemanticCache:
+    """Reuse LLM scores for (job, CV) pairs close to ones already scored.
+
+    Callers embed the same truncated text the prompt sends. The job
+    description and CV are embedded separately, each as the mean of
+    fixed-size word windows so text past the embedding model's input limit
+    still counts, and a hit requires both cosine similarities to clear the
+    threshold.
+
+    Entries live in a capped Redis stream; each process keeps the newest
+    max_entries in memory as matrices and pulls new ones with sync().
+    """
+
+    def __init__(self, threshold, max_entries):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.sync_lock = threading.Lock()
+        self.model_lock = threading.Lock()
+        self.model = None
+        self.disabled = False
+        self.job_embs = None
+        self.cv_embs = None
+        self.results = []
+        self.last_id = "0-0"
+
+    def _load_model(self):
+        with self.model_lock:
+            if self.model is None and not self.disabled:
+                try:
+                    # Heavy import (torch); only pay for it once the cache is used
+                    from sentence_transformers import SentenceTransformer
+                    self.model = SentenceTransformer(EMBEDDING_MODEL)
+                except Exception as e:
+                    logger.error(f"Embedding model load failed, semantic cache disabled: {e}")
+                    self.disabled = True
+            return self.model is not None
+
+    def embed(self, texts):
+        """Embed texts, or return None when the embedding model is unavailable."""
+        if not self._load_model():
+            return None
+        try:
+            return self._embed(texts)
+        except Exception as e:
+            logger.error(f"Embedding failed, skipping semantic cache: {e}")
+            return None
+
+    def _embed(self, texts):
+        windows, owners = [], []
+        for i, text in enumerate(texts):
+            words = text.split() or [""]
+            for start in range(0, len(words), EMBED_WINDOW_WORDS):
+                windows.append(" ".join(words[start:start + EMBED_WINDOW_WORDS]))
+                owners.append(i)
+        vectors = self.model.encode(windows, normalize_embeddings=True)
+        owners = np.asarray(owners)
+        embs = np.stack([vectors[owners == i].mean(axis=0) for i in range(len(texts))])
+        return embs / np.linalg.norm(embs, axis=1, keepdims=True)
+
+    def sync(self):
+        """Pull entries added by any worker since the last sync."""
+        with self.sync_lock:
+            try:
+                response = redis_client.xread({SEMANTIC_CACHE_KEY: self.last_id})
+            except redis.RedisError as e:
+                logger.error(f"Semantic cache sync failed: {e}")
+                return
+            if not response:
+                return
+            entries = response[0][1]
+            job_embs = np.stack([_decode_vector(fields["job"]) for _, fields in entries])
+            cv_embs = np.stack([_decode_vector(fields["cv"]) for _, fields in entries])
+            results = [json.loads(fields["result"]) for _, fields in entries]
+
+            with self.lock:
+                if self.results:
+                    job_embs = np.vstack([self.job_embs, job_embs])
+                    cv_embs = np.vstack([self.cv_embs, cv_embs])
+                    results = self.results + results
+                self.job_embs = job_embs[-self.max_entries:]
+                self.cv_embs = cv_embs[-self.max_entries:]
+                self.results = results[-self.max_entries:]
+                self.last_id = entries[-1][0]
+
+    def lookup(self, job_emb, cv_emb):
+        if job_emb is None or cv_emb is None:
+            return None
+        with self.lock:
+            if not self.results:
+                return None
+            similarity = np.minimum(self.job_embs @ job_emb, self.cv_embs @ cv_emb)
+            best = int(np.argmax(similarity))
+            if similarity[best] < self.threshold:
+                return None
+            return {
+                "score": self.results[best].get("score"),
+                "explanation": REUSED_SCORE_EXPLANATION,
+                "matched_skills": []
+            }
 
-        progress_store[job_id]["progress"] = 30
-        progress_store[job_id]["message"] = "Analyzing with AI"
+    def add(self, job_emb, cv_embs, results):
+        if job_emb is None or not results:
+            return
+        # Written to Redis only; every process, this one included, picks the
+        # entries up on its next sync()
+        pipe = redis_client.pipeline()
+        for cv_emb, result in zip(cv_embs, results):
+            pipe.xadd(
+                SEMANTIC_CACHE_KEY,
+                {
+                    "job": _encode_vector(job_emb),
+                    "cv": _encode_vector(cv_emb),
+                    "result": json.dumps({"score": result.get("score")}),
+                },
+                maxlen=self.max_entries,
+                approximate=True,
+            )
+        try:
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.error(f"Semantic cache write failed: {e}")
+
+semantic_cache = SemanticCache(SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_MAX_ENTRIES)
+
+@lru_cache(maxsize=32)
+def embed_job_text(job_text):
+    """Job embedding, computed once and shared by every batch for that job."""
+    embs = semantic_cache.embed([job_text])
+    return None if embs is None else embs[0]
 
-        prompt = build_evaluation_prompt(job_text, cv_text)
-        result = ollama_json_request(prompt)
+# ==================================================
+# Background Task
+# ==================================================
+def fallback_result(filename, explanation):
+    return {
+        "applicant_name": filename,
+        "contact": "N/A",
+        "score": 0,
+        "explanation": explanation,
+        "matched_skills": []
+    }
 
-        if not result:
-            result = {
-                "applicant_name": filename,
-                "contact": "N/A",
-                "score": 0,
-                "explanation": "LLM failed",
-                "matched_skills": []
-            }
+def normalize_result(result, filename):
+    """Coerce an LLM or cached result into the fields the dashboard renders."""
+    try:
+        score = min(max(int(float(str(result.get("score", 0)).rstrip("%"))), 0), 100)
+    except (TypeError, ValueError):
+        score = 0
+    skills = result.get("matched_skills")
+    if isinstance(skills, str):
+        skills = [skill.strip() for skill in skills.split(",") if skill.strip()]
+    elif not isinstance(skills, list):
+        skills = []
+    return {
+        "applicant_name": str(result.get("applicant_name") or filename),
+        "contact": str(result.get("contact") or "N/A"),
+        "score": score,
+        "explanation": str(result.get("explanation") or ""),
+        "matched_skills": [str(skill) for skill in skills]
+    }
 
-        progress_store[job_id]["progress"] = 100
-        progress_store[job_id]["message"] = "Completed"
-        progress_store[job_id]["result"] = result
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+# A leading "+" or 9+ digits on one line; looser patterns match date ranges
+# such as "2015 - 2020"
+PHONE_PATTERN = re.compile(r"\+\d[\d \t()-]{6,}\d|(?<![\d(])\(?(?:\d[ \t()-]{0,2}){8,}\d(?!\d)")
+
+def candidate_identity(filename, cv_text):
+    """Name/contact for a result that did not come from reading this CV."""
+    match = EMAIL_PATTERN.search(cv_text) or PHONE_PATTERN.search(cv_text)
+    return {"applicant_name": filename, "contact": match.group(0) if match else "N/A"}
+
+def parse_batch_results(parsed):
+    """Map CV number -> result object from a batch response."""
+    results = {}
+    if not isinstance(parsed, list):
+        return results
+    for item in parsed:
+        if not isinstance(item, dict):
+            continue
+        try:
+            index = int(str(item.pop("id", "")).replace("CV_", ""))
+        except ValueError:
+            continue
+        results[index] = item
+    return results
+
+def screen_batch_job(job_text, system, batch):
+    """Score a batch of (job_id, cv_path, filename) with one LLM request.
+
+    job_text and system are the truncated job description and its prompt
+    prefix, prepared once per screening run and shared by all batches.
+
+    Cached CVs are skipped; CVs missing from the batch response are retried
+    individually.
+    """
+    pending = [job_id for job_id, _, _ in batch]
+    try:
+        for job_id in pending:
+            set_progress(job_id, 5, "Reading CV")
+        readable, cv_texts = [], []
+        for job_id, cv_path, filename in batch:
+            text = extract_text(cv_path)
+            if text is None:
+                set_progress(job_id, 100, "Error", fallback_result(filename, "Could not read CV, please upload it again"))
+                pending.remove(job_id)
+            else:
+                readable.append((job_id, cv_path, filename))
+                cv_texts.append(prompt_cv_text(text))
+        batch = readable
+
+        # The semantic cache is optional; without embeddings every CV is a miss
+        job_emb = embed_job_text(job_text)
+        cv_embs = semantic_cache.embed(cv_texts) if job_emb is not None else None
+        if cv_embs is None:
+            cv_embs = [None] * len(cv_texts)
+
+        # Serve near-duplicate (job, CV) pairs from the cache
+        if job_emb is not None:
+            semantic_cache.sync()
+        misses = []
+        for (job_id, _, filename), cv_text, cv_emb in zip(batch, cv_texts, cv_embs):
+            cached = semantic_cache.lookup(job_emb, cv_emb)
+            if cached is not None:
+                cached.update(candidate_identity(filename, cv_text))
+                set_progress(job_id, 100, "Completed", normalize_result(cached, filename))
+                pending.remove(job_id)
+            else:
+                misses.append((job_id, filename, cv_text, cv_emb))
+
+        for job_id in pending:
+            set_progress(job_id, 30, "Analyzing with AI")
+
+        results = {}
+        if len(misses) > 1:
+            prompt = build_batch_evaluation_prompt([cv_text for _, _, cv_text, _ in misses])
+            results = parse_batch_results(
+                llm_json_request(prompt, system=system, max_tokens=MAX_OUTPUT_TOKENS * len(misses))
+            )
+
+        scored_embs, scored = [], []
+        for index, (job_id, filename, cv_text, cv_emb) in enumerate(misses, start=1):
+            result = results.get(index)
+            if result is None:
+                prompt = build_evaluation_prompt(cv_text)
+                result = llm_json_request(prompt, system=system)
+            if isinstance(result, dict):
+                result = normalize_result(result, filename)
+                if cv_emb is not None:
+                    scored_embs.append(cv_emb)
+                    scored.append(result)
+            else:
+                result = fallback_result(filename, "LLM failed")
+
+            set_progress(job_id, 100, "Completed", result)
+            pending.remove(job_id)
+
+        semantic_cache.add(job_emb, scored_embs, scored)
 
     except Exception as e:
-        progress_store[job_id]["progress"] = 100
-        progress_store[job_id]["message"] = "Error"
-        progress_store[job_id]["result"] = {
-            "applicant_name": filename,
-            "contact": "N/A",
-            "score": 0,
-            "explanation": str(e),
-            "matched_skills": []
-        }
+        for job_id, _, filename in batch:
+            if job_id in pending:
+                set_progress(job_id, 100, "Error", fallback_result(filename, str(e)))
 
 # ==================================================
 # Routes
@@ -222,40 +876,78 @@ def dashboard():
 @login_required
 def screen_candidates():
     user = next((u for u in mock_users.values() if u["id"] == session["user_id"]), None)
-    if user["usage_count"] >= PLANS[user["plan"]]["limit"]:
-        return jsonify({"error": "Usage limit reached"}), 403
 
     job_text = request.form.get("job_text", "")
     job_file = request.files.get("job_file")
+    if job_file and not allowed_file(job_file.filename):
+        return jsonify({"error": "Job description must be a PDF or DOCX file"}), 400
+
+    cvs = request.files.getlist("cvs")
+    rejected = [cv.filename for cv in cvs if not allowed_file(cv.filename)]
+    cvs = [cv for cv in cvs if allowed_file(cv.filename)]
+    if not cvs:
+        return jsonify({"error": "No PDF or DOCX CVs uploaded", "rejected": rejected}), 400
+
+    # Read the job file before charging, so a failed read doesn't use up the plan
     if job_file:
-        path = os.path.join(UPLOAD_FOLDER, secure_filename(job_file.filename))
-        job_file.save(path)
+        path = upload_path(job_file.filename)
+        save_upload(job_file, path)
         job_text = extract_text(path)
+        if job_text is None:
+            return jsonify({"error": "Could not read the job description, please try again"}), 503
 
-    cvs = request.files.getlist("cvs")
-    job_ids = []
+    # Atomic across worker processes, so concurrent requests can't overshoot the plan
+    if not reserve_usage(user):
+        return jsonify({"error": "Usage limit reached"}), 403
+
+    # Prepare the job side once; every batch shares the same prompt prefix.
+    # Its embedding is computed lazily on the screening pool, not here.
+    job_text = prompt_job_text(job_text)
+    system = build_system_prompt(job_text)
+
+    jobs = []
 
     for cv in cvs:
-        cv_path = os.path.join(UPLOAD_FOLDER, f"{uuid.uuid4()}_{secure_filename(cv.filename)}")
-        cv.save(cv_path)
+        cv_path = upload_path(cv.filename)
+        save_upload(cv, cv_path)
         job_id = str(uuid.uuid4())
-        job_ids.append(job_id)
+        set_progress(job_id, 0, "Queued")
+        jobs.append((job_id, cv_path, cv.filename))
+
+    # Queue CVs on the bounded screening pool, one LLM request per batch
+    for i in range(0, len(jobs), OLLAMA_BATCH_SIZE):
+        EXECUTOR.submit(screen_batch_job, job_text, system, jobs[i:i + OLLAMA_BATCH_SIZE])
 
-        # Start thread for this CV
-        t = threading.Thread(target=screen_cv_job, args=(job_id, job_text, cv_path, cv.filename))
-        t.start()
+    job_ids = [job_id for job_id, _, _ in jobs]
+    filenames = [filename for _, _, filename in jobs]
 
-    user["usage_count"] += 1
-    return jsonify({"message": "Screening started", "job_ids": job_ids})
+    return jsonify({
+        "message": "Screening started",
+        "job_ids": job_ids,
+        "filenames": filenames,
+        "rejected": rejected
+    })
 
 @app.route("/job/<job_id>/progress")
 @login_required
 def job_progress(job_id):
-    job = progress_store.get(job_id)
+    job = get_progress([job_id])[job_id]
     if not job:
         return jsonify({"error": "Job not found"}), 404
     return jsonify(job)
 
+@app.route("/jobs/progress", methods=["POST"])
+@login_required
+def jobs_progress():
+    # One poll for every CV in a screening run instead of one request per CV
+    body = request.get_json(silent=True)
+    job_ids = body.get("job_ids") if isinstance(body, dict) else None
+    if not isinstance(job_ids, list) or not all(isinstance(job_id, str) for job_id in job_ids):
+        return jsonify({"error": "job_ids must be a list of strings"}), 400
+    if len(job_ids) > MAX_PROGRESS_IDS:
+        return jsonify({"error": f"At most {MAX_PROGRESS_IDS} job_ids per request"}), 400
+    return jsonify(get_progress(job_ids))
+
 # ==================================================
 # Run
 # ==================================================
@@ -0,0 +1,68 @@
+"""CV text parsers.
+
+Kept free of import-time side effects: extraction worker processes import
+this module, not app.py.
+"""
+import io
+import signal
+import logging
+import pypdf
+import pdfplumber
+from docx import Document
+
+logger = logging.getLogger(__name__)
+
+class ParseTimeout(BaseException):
+    """Raised in a worker when a parse overruns its deadline.
+
+    A BaseException so the parsers' own `except Exception` can't swallow it.
+    """
+
+def parse_with_deadline(parse, data, seconds):
+    """Run parse(data), raising ParseTimeout after `seconds` of work.
+
+    The alarm interrupts the parse inside the worker, which then picks up
+    the next file; no process has to be killed. Without SIGALRM (Windows)
+    the caller's result() timeout is the only guard.
+    """
+    if not hasattr(signal, "SIGALRM"):
+        return parse(data)
+
+    def expire(signum, frame):
+        raise ParseTimeout(f"parse exceeded {seconds}s")
+
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.alarm(seconds)
+    try:
+        return parse(data)
+    finally:
+        signal.alarm(0)
+        signal.signal(signal.SIGALRM, previous)
+
+# Later pages add nothing once the CV is truncated for the prompt
+MAX_PDF_PAGES = 5
+
+def extract_text_from_pdf(data):
+    try:
+        reader = pypdf.PdfReader(io.BytesIO(data))
+        pages = [page.extract_text() or "" for page in reader.pages[:MAX_PDF_PAGES]]
+
+        # pypdf skips some layouts; retry only the empty pages with pdfplumber,
+        # loading just those pages (pdfplumber numbers pages from 1)
+        empty = [i for i, text in enumerate(pages) if not text.strip()]
+        if empty:
+            with pdfplumber.open(io.BytesIO(data), pages=[i + 1 for i in empty]) as pdf:
+                for i, page in zip(empty, pdf.pages):
+                    pages[i] = page.extract_text() or ""
+        return "\n".join(pages).strip()
+    except Exception as e:
+        logger.error(f"PDF extraction failed: {e}")
+        return ""
+
+def extract_text_from_docx(data):
+    try:
+        doc = Document(io.BytesIO(data))
+        return "\n".join(p.text for p in doc.paragraphs).strip()
+    except Exception as e:
+        logger.error(f"DOCX extraction failed: {e}")
+        return ""
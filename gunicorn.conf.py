@@ -0,0 +1,16 @@
+# Gunicorn settings, loaded automatically by `gunicorn app:app`.
+#
+# Job progress, usage counts and the LLM/semantic caches live in Redis, so
+# any worker can serve any request. Each worker runs its own screening pool;
+# app.py splits OLLAMA_CONCURRENCY across WEB_CONCURRENCY workers, so keep
+# workers <= OLLAMA_CONCURRENCY to stay within Ollama's parallelism.
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:5000")
+workers = int(os.getenv("WEB_CONCURRENCY", 4))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", 8))
+timeout = 300
+
+# Workers import app.py after this file runs; make sure they see the same count
+os.environ["WEB_CONCURRENCY"] = str(workers)